@@ -9,18 +9,21 @@
 
 import asyncio
 import json
-import math
+import re
+import threading
 import time
 import webbrowser
-from binascii import hexlify
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from math import asin, cos, hypot, pi, sin, sqrt
+from operator import attrgetter
+from typing import Deque
 
 import serial
 import uvicorn
 import websockets
 from fastapi import WebSocket
-from haversine import Unit, haversine
 from pydantic import ValidationError
 from pydantic.tools import parse_obj_as
 from qrkey import QrkeyController, SubscriptionModel, qrkey_settings
@@ -33,7 +36,7 @@ from dotbot import (
 from dotbot.dotbot_simulator import DotBotSimulatorSerialInterface
 from dotbot.hdlc import HDLCHandler, HDLCState, hdlc_encode
 from dotbot.lighthouse2 import LighthouseManager, LighthouseManagerState
-from dotbot.logger import LOGGER
+from dotbot.logger import LOGGER, is_debug_enabled
 from dotbot.models import (
     MAX_POSITION_HISTORY_SIZE,
     DotBotCalibrationIndexModel,
@@ -85,6 +88,16 @@ LOST_DELAY = 5  # seconds
 DEAD_DELAY = 60  # seconds
 LH2_POSITION_DISTANCE_THRESHOLD = 0.01
 GPS_POSITION_DISTANCE_THRESHOLD = 5  # meters
+EARTH_RADIUS = 6371008.8  # meters
+EARTH_DIAMETER = 2 * EARTH_RADIUS
+DEG_TO_RAD = pi / 180
+HALF_DEG_TO_RAD = DEG_TO_RAD * 0.5
+SERIAL_TX_BATCH_MAX_SIZE = 256  # bytes
+STATUS_REFRESH_INTERVAL_MIN = 0.1  # seconds
+COMMAND_TOPIC_RE = re.compile(r"^/command/([^/]+)/([^/]+)/([^/]+)/([^/]+)$")
+# Reload notifications carry no data, they are built and serialized only once
+RELOAD_NOTIFICATION = DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD)
+RELOAD_NOTIFICATION_MESSAGE = RELOAD_NOTIFICATION.model_dump(exclude_none=True)
 
 
 class ControllerException(Exception):
@@ -104,25 +117,59 @@ class ControllerSettings:
     webbrowser: bool = False
     handshake: bool = False
     verbose: bool = False
+    log_sample_every: int = 1  # log 1 out of N sent payloads, 0 to disable
+    # Period of the dotbots status (alive/lost/dead) refresh, in seconds. Lower
+    # values detect lost dotbots sooner but wake up the event loop more often.
+    status_refresh_interval: float = 1.0
+    # Integer values of the hex addresses above, parsed once
+    gw_address_int: int = field(init=False, repr=False)
+    swarm_id_int: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.gw_address_int = int(self.gw_address, 16)
+        self.swarm_id_int = int(self.swarm_id, 16)
+        if self.status_refresh_interval < STATUS_REFRESH_INTERVAL_MIN:
+            raise ValueError(
+                f"status_refresh_interval must be at least "
+                f"{STATUS_REFRESH_INTERVAL_MIN}s"
+            )
 
 
 def lh2_distance(last: DotBotLH2Position, new: DotBotLH2Position) -> float:
     """Helper function that computes the distance between 2 LH2 positions."""
-    return math.sqrt(((new.x - last.x) ** 2) + ((new.y - last.y) ** 2))
+    return hypot(new.x - last.x, new.y - last.y)
 
 
 def gps_distance(last: DotBotGPSPosition, new: DotBotGPSPosition) -> float:
     """Helper function that computes the distance between 2 GPS positions in m."""
-    return haversine(
-        (last.latitude, last.longitude), (new.latitude, new.longitude), unit=Unit.METERS
-    )
+    lat1 = last.latitude * DEG_TO_RAD
+    lat2 = new.latitude * DEG_TO_RAD
+    sin_dlat = sin((lat2 - lat1) * 0.5)
+    sin_dlon = sin((new.longitude - last.longitude) * HALF_DEG_TO_RAD)
+    a = sin_dlat * sin_dlat + cos(lat1) * cos(lat2) * sin_dlon * sin_dlon
+    return EARTH_DIAMETER * asin(sqrt(a))
+
+
+class WebServer(uvicorn.Server):
+    """Uvicorn server that signals when it accepts connections."""
+
+    def __init__(self, config: uvicorn.Config, ready: asyncio.Event):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started is True:
+            self.ready.set()
 
 
 class Controller:
     """Abstract base class of specific implementations of Dotbot controllers."""
 
     def __init__(self, settings: ControllerSettings):
-        self.dotbots: Dict[str, DotBotModel] = {}
+        self.dotbots: dict[str, DotBotModel] = {}
+        self._sorted_dotbots_keys: frozenset = frozenset()
+        self._sorted_dotbots_cache: list[str] = []
         # self.dotbots: Dict[str, DotBotModel] = {
         #     "0000000000000001": DotBotModel(
         #         address="0000000000000001",
@@ -150,16 +197,22 @@ class Controller:
         #     ),
         # }
         self.logger = LOGGER.bind(context=__name__)
+        self._debug_enabled = is_debug_enabled()
+        self._log_counter = 0
         self.header = ProtocolHeader(
             destination=int(DOTBOT_ADDRESS_DEFAULT, 16),
-            source=int(settings.gw_address, 16),
-            swarm_id=int(settings.swarm_id, 16),
+            source=settings.gw_address_int,
+            swarm_id=settings.swarm_id_int,
             application=ApplicationType.DotBot,
             version=PROTOCOL_VERSION,
         )
         self.settings = settings
         self.hdlc_handler = HDLCHandler()
         self.serial = None
+        self._tx_queue: Deque[bytes] = deque()
+        self._tx_event = asyncio.Event()
+        self._web_ready = asyncio.Event()
+        self._updated_dotbots: set[str] = set()
         self.websockets = []
         self.lh2_manager = LighthouseManager()
         self.api = api
@@ -186,20 +239,30 @@ class Controller:
             SubscriptionModel(topic="/lh2/start", callback=self.on_lh2_start),
         ]
 
+    def _parse_command_topic(self, topic: str, command: str):
+        """Returns the swarm id, address and application of a command topic."""
+        match = COMMAND_TOPIC_RE.match(topic)
+        if match is None or match.group(4) != command:
+            self.logger.warning(
+                f"Invalid {command} command topic", command=command, topic=topic
+            )
+            return None
+        return match.group(1, 2, 3)
+
     def on_command_move_raw(self, topic, payload):
         """Called when a move raw command is received."""
-        logger = self.logger.bind(command="move_raw", topic=topic)
-        topic_split = topic.split("/")[2:]
-        if len(topic_split) != 4 or topic_split[-1] != "move_raw":
-            logger.warning("Invalid move_raw command topic")
+        topic_fields = self._parse_command_topic(topic, "move_raw")
+        if topic_fields is None:
             return
-        swarm_id, address, application, _ = topic_split
+        swarm_id, address, application = topic_fields
         try:
             command = DotBotMoveRawCommandModel(**payload)
         except ValidationError as exc:
             self.logger.warning(f"Invalid move raw command: {exc.errors()}")
             return
-        logger.bind(
+        logger = self.logger.bind(
+            command="move_raw",
+            topic=topic,
             address=address,
             application=ApplicationType(int(application)).name,
             **command.model_dump(),
@@ -210,7 +273,7 @@ class Controller:
         logger.info("Sending command")
         header = ProtocolHeader(
             destination=int(address, 16),
-            source=int(self.settings.gw_address, 16),
+            source=self.settings.gw_address_int,
             swarm_id=int(swarm_id, 16),
             application=ApplicationType(int(application)),
             version=PROTOCOL_VERSION,
@@ -230,18 +293,18 @@ class Controller:
 
     def on_command_rgb_led(self, topic, payload):
         """Called when an rgb led command is received."""
-        logger = self.logger.bind(command="rgb_led", topic=topic)
-        topic_split = topic.split("/")[2:]
-        if len(topic_split) != 4 or topic_split[-1] != "rgb_led":
-            logger.warning("Invalid rgb_led command topic")
+        topic_fields = self._parse_command_topic(topic, "rgb_led")
+        if topic_fields is None:
             return
-        swarm_id, address, application, _ = topic_split
+        swarm_id, address, application = topic_fields
         try:
             command = DotBotRgbLedCommandModel(**payload)
         except ValidationError as exc:
             LOGGER.warning(f"Invalid rgb led command: {exc.errors()}")
             return
-        logger = logger.bind(
+        logger = self.logger.bind(
+            command="rgb_led",
+            topic=topic,
             address=address,
             application=ApplicationType(int(application)).name,
             **command.model_dump(),
@@ -252,7 +315,7 @@ class Controller:
         logger.info("Sending command")
         header = ProtocolHeader(
             destination=int(address, 16),
-            source=int(self.settings.gw_address, 16),
+            source=self.settings.gw_address_int,
             swarm_id=int(swarm_id, 16),
             application=ApplicationType(int(application)),
             version=PROTOCOL_VERSION,
@@ -266,25 +329,26 @@ class Controller:
         self.dotbots[address].rgb_led = command
         self.qrkey.publish(
             "/notify",
-            DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD).model_dump(
-                exclude_none=True
-            ),
+            DotBotNotificationModel(
+                cmd=DotBotNotificationCommand.UPDATE,
+                data=DotBotNotificationUpdate(address=address, rgb_led=command),
+            ).model_dump(exclude_none=True),
         )
 
     def on_command_xgo_action(self, topic, payload):
         """Called when an rgb led command is received."""
-        logger = self.logger.bind(command="xgo_action", topic=topic)
-        topic_split = topic.split("/")[2:]
-        if len(topic_split) != 4 or topic_split[-1] != "xgo_action":
-            logger.warning("Invalid xgo_action command topic")
+        topic_fields = self._parse_command_topic(topic, "xgo_action")
+        if topic_fields is None:
             return
-        swarm_id, address, application, _ = topic_split
+        swarm_id, address, application = topic_fields
         try:
             command = DotBotXGOActionCommandModel(**payload)
         except ValidationError as exc:
             LOGGER.warning(f"Invalid rgb led command: {exc.errors()}")
             return
-        logger = logger.bind(
+        logger = self.logger.bind(
+            command="xgo_action",
+            topic=topic,
             address=address,
             application=ApplicationType(int(application)).name,
             **command.model_dump(),
@@ -295,7 +359,7 @@ class Controller:
         logger.info("Sending command")
         header = ProtocolHeader(
             destination=int(address, 16),
-            source=int(self.settings.gw_address, 16),
+            source=self.settings.gw_address_int,
             swarm_id=int(swarm_id, 16),
             application=ApplicationType(int(application)),
             version=PROTOCOL_VERSION,
@@ -309,36 +373,36 @@ class Controller:
 
     def on_command_waypoints(self, topic, payload):
         """Called when a list of waypoints is received."""
-        logger = self.logger.bind(command="waypoints", topic=topic)
-        topic_split = topic.split("/")[2:]
-        if len(topic_split) != 4 or topic_split[-1] != "waypoints":
-            logger.warning("Invalid waypoints command topic")
+        topic_fields = self._parse_command_topic(topic, "waypoints")
+        if topic_fields is None:
             return
-        swarm_id, address, application, _ = topic_split
+        swarm_id, address, application = topic_fields
         command = parse_obj_as(DotBotWaypoints, payload)
-        logger = logger.bind(
+        application = ApplicationType(int(application))
+        logger = self.logger.bind(
+            command="waypoints",
+            topic=topic,
             address=address,
-            application=ApplicationType(int(application)).name,
+            application=application.name,
             threshold=command.threshold,
             length=len(command.waypoints),
         )
-        if address not in self.dotbots:
+        dotbot = self.dotbots.get(address)
+        if dotbot is None:
             logger.warning("DotBot not found")
             return
         logger.info("Sending command")
         header = ProtocolHeader(
             destination=int(address, 16),
-            source=int(self.settings.gw_address, 16),
+            source=self.settings.gw_address_int,
             swarm_id=int(swarm_id, 16),
-            application=ApplicationType(int(application)),
+            application=application,
             version=PROTOCOL_VERSION,
         )
         waypoints_list = command.waypoints
-        if ApplicationType(int(application)) == ApplicationType.SailBot:
-            if self.dotbots[address].gps_position is not None:
-                waypoints_list = [
-                    self.dotbots[address].gps_position
-                ] + command.waypoints
+        if application == ApplicationType.SailBot:
+            if dotbot.gps_position is not None:
+                waypoints_list = [dotbot.gps_position] + command.waypoints
             payload = ProtocolPayload(
                 header,
                 PayloadType.GPS_WAYPOINTS,
@@ -354,10 +418,8 @@ class Controller:
                 ),
             )
         else:  # DotBot application
-            if self.dotbots[address].lh2_position is not None:
-                waypoints_list = [
-                    self.dotbots[address].lh2_position
-                ] + command.waypoints
+            if dotbot.lh2_position is not None:
+                waypoints_list = [dotbot.lh2_position] + command.waypoints
             payload = ProtocolPayload(
                 header,
                 PayloadType.LH2_WAYPOINTS,
@@ -374,24 +436,29 @@ class Controller:
                 ),
             )
         self.send_payload(payload)
-        self.dotbots[address].waypoints = waypoints_list
-        self.dotbots[address].waypoints_threshold = command.threshold
+        dotbot.waypoints = waypoints_list
+        dotbot.waypoints_threshold = command.threshold
         self.qrkey.publish(
             "/notify",
-            DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD).model_dump(
-                exclude_none=True
-            ),
+            DotBotNotificationModel(
+                cmd=DotBotNotificationCommand.UPDATE,
+                data=DotBotNotificationUpdate(
+                    address=address,
+                    waypoints=waypoints_list,
+                    waypoints_threshold=command.threshold,
+                ),
+            ).model_dump(exclude_none=True),
         )
 
     def on_command_clear_position_history(self, topic, _):
         """Called when a clear position history command is received."""
-        logger = self.logger.bind(command="clear_position_history", topic=topic)
-        topic_split = topic.split("/")[2:]
-        if len(topic_split) != 4 or topic_split[-1] != "clear_position_history":
-            logger.warning("Invalid clear_position_history command topic")
+        topic_fields = self._parse_command_topic(topic, "clear_position_history")
+        if topic_fields is None:
             return
-        _, address, application, _ = topic_split
-        logger = logger.bind(
+        _, address, application = topic_fields
+        logger = self.logger.bind(
+            command="clear_position_history",
+            topic=topic,
             address=address,
             application=ApplicationType(int(application)).name,
         )
@@ -399,28 +466,26 @@ class Controller:
             logger.warning("DotBot not found")
             return
         logger.info("Sending command")
-        self.dotbots[address].position_history = []
+        self.dotbots[address].position_history.clear()
         self.qrkey.publish(
             "/notify",
-            DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD).model_dump(
-                exclude_none=True
-            ),
+            RELOAD_NOTIFICATION_MESSAGE,
         )
 
     def on_lh2_add(self, topic, payload):
         """Called when an lh2 calibration point is added."""
-        logger = self.logger.bind(lh2="add", topic=topic)
         topic_split = topic.split("/")[1:]
         if len(topic_split) != 2 or topic_split[-1] != "add":
-            logger.warning("Invalid lh2 add topic")
+            self.logger.warning("Invalid lh2 add topic", lh2="add", topic=topic)
             return
         try:
             payload = DotBotCalibrationIndexModel(**payload)
         except ValidationError as exc:
             self.logger.warning(f"Invalid calibration index payload: {exc.errors()}")
             return
-        logger = self.logger.bind(**payload.model_dump())
-        logger.info("Add calibration point")
+        self.logger.info(
+            "Add calibration point", lh2="add", topic=topic, **payload.model_dump()
+        )
         self.lh2_manager.add_calibration_point(payload.index)
 
     def on_lh2_start(self, topic, _):
@@ -468,10 +533,23 @@ class Controller:
         """Starts the serial listener thread in a coroutine."""
         queue = asyncio.Queue()
         event_loop = asyncio.get_event_loop()
+        handshake_pending = threading.Event()
 
         def on_byte_received(byte):
-            """Callback called on byte received."""
-            event_loop.call_soon_threadsafe(queue.put_nowait, byte)
+            """Callback called on byte received, from the serial thread.
+
+            Frames are decoded in the serial thread so the event loop is only
+            woken up once per received payload instead of once per byte.
+            """
+            if handshake_pending.is_set():
+                # Only the handshake reply goes to the queue, the following
+                # bytes are decoded right away so none of them is lost
+                handshake_pending.clear()
+                event_loop.call_soon_threadsafe(queue.put_nowait, byte)
+                return
+            payload = self.decode_byte(byte)
+            if payload is not None:
+                event_loop.call_soon_threadsafe(self.handle_received_payload, payload)
 
         async def _wait_for_handshake(queue):
             """Waits for handshake reply and checks it."""
@@ -487,6 +565,9 @@ class Controller:
         elif self.settings.port == "dotbot-simulator":
             self.serial = DotBotSimulatorSerialInterface(on_byte_received)
         else:
+            # Simulators don't reply to the handshake
+            if self.settings.handshake is True:
+                handshake_pending.set()
             self.serial = SerialInterface(
                 self.settings.port, self.settings.baudrate, on_byte_received
             )
@@ -499,22 +580,9 @@ class Controller:
                 await asyncio.wait_for(_wait_for_handshake(queue), timeout=0.2)
                 self.logger.info("Serial handshake success")
 
-        while 1:
-            byte = await queue.get()
-            self.handle_byte(byte)
-
     async def _open_webbrowser(self):
         """Wait until the server is ready before opening a web browser."""
-        while 1:
-            try:
-                _, writer = await asyncio.open_connection(
-                    "127.0.0.1", self.settings.controller_port
-                )
-            except ConnectionRefusedError:
-                await asyncio.sleep(0.1)
-            else:
-                writer.close()
-                break
+        await self._web_ready.wait()
         url = (
             f"http://localhost:{self.settings.controller_port}/PyDotBot?"
             f"pin={self.qrkey.pin_code}&"
@@ -535,36 +603,36 @@ class Controller:
     async def _dotbots_status_refresh(self):
         """Coroutine that periodically updates the status of known dotbot."""
         while 1:
-            needs_refresh = [False] * len(self.dotbots)
-            for idx, dotbot in enumerate(self.dotbots.values()):
+            await asyncio.sleep(self.settings.status_refresh_interval)
+            if not self.dotbots:
+                continue
+            now = time.time()
+            dead_before = now - DEAD_DELAY
+            lost_before = now - LOST_DELAY
+            needs_refresh = False
+            for dotbot in self.dotbots.values():
                 previous_status = dotbot.status
-                if dotbot.last_seen + DEAD_DELAY < time.time():
+                if dotbot.last_seen < dead_before:
                     dotbot.status = DotBotStatus.DEAD
-                elif dotbot.last_seen + LOST_DELAY < time.time():
+                elif dotbot.last_seen < lost_before:
                     dotbot.status = DotBotStatus.LOST
                 else:
                     dotbot.status = DotBotStatus.ALIVE
-                logger = self.logger.bind(
-                    source=dotbot.address,
-                    application=dotbot.application.name,
-                )
-                if len(needs_refresh) > idx:
-                    needs_refresh[idx] = bool(previous_status != dotbot.status)
-                    if needs_refresh[idx]:
-                        logger.info(
-                            "Dotbot status changed",
-                            previous_status=previous_status.name,
-                            status=dotbot.status.name,
-                        )
-            if any(needs_refresh) is True:
-                await self.notify_clients(
-                    DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD)
-                )
-            await asyncio.sleep(1)
+                if previous_status != dotbot.status:
+                    needs_refresh = True
+                    self.logger.info(
+                        "Dotbot status changed",
+                        source=dotbot.address,
+                        application=dotbot.application.name,
+                        previous_status=previous_status.name,
+                        status=dotbot.status.name,
+                    )
+            if needs_refresh is True:
+                await self.notify_clients(RELOAD_NOTIFICATION)
 
     def _compute_lh2_position(
         self, payload: ProtocolPayload
-    ) -> Optional[DotBotLH2Position]:
+    ) -> DotBotLH2Position | None:
         if payload.payload_type not in (
             PayloadType.LH2_RAW_DATA,
             PayloadType.DOTBOT_DATA,
@@ -575,20 +643,25 @@ class Controller:
             return None
         return self.lh2_manager.compute_position(payload.values)
 
-    def handle_byte(self, byte):
-        """Called on each byte received over UART."""
+    def decode_byte(self, byte) -> ProtocolPayload | None:
+        """Called on each byte received over UART, returns the payload once complete."""
         self.hdlc_handler.handle_byte(byte)
-        if self.hdlc_handler.state == HDLCState.READY:
-            payload = self.hdlc_handler.payload
-            if payload:
-                try:
-                    payload = ProtocolPayload.from_bytes(payload)
-                except ProtocolPayloadParserException:
-                    self.logger.warning("Cannot parse payload")
-                    if self.settings.verbose is True:
-                        print(payload)
-                    return
-                self.handle_received_payload(payload)
+        if self.hdlc_handler.state != HDLCState.READY:
+            return None
+        payload = self.hdlc_handler.payload
+        if not payload:
+            return None
+        try:
+            payload = ProtocolPayload.from_bytes(payload)
+        except ProtocolPayloadParserException:
+            self.logger.warning("Cannot parse payload")
+            if self.settings.verbose is True:
+                print(payload)
+            return None
+        if self.settings.verbose is True:
+            # Printed from the serial thread, a slow terminal won't block the loop
+            print(payload)
+        return payload
 
     def handle_received_payload(
         self, payload: ProtocolPayload
@@ -600,53 +673,41 @@ class Controller:
             PayloadType.CMD_RGB_LED,
         ]:
             return
-        source = hexlify(int(payload.header.source).to_bytes(8, "big")).decode()
-        logger = self.logger.bind(
-            source=source,
-            payload_type=payload.payload_type.name,
-            application=payload.header.application.name,
-            msg_id=payload.header.msg_id,
-        )
+        source = f"{payload.header.source:016x}"
+        # Passed to each log call instead of binding a new logger per payload
+        log_context = {
+            "source": source,
+            "payload_type": payload.payload_type.name,
+            "application": payload.header.application.name,
+            "msg_id": payload.header.msg_id,
+        }
         if source == GATEWAY_ADDRESS_DEFAULT:
-            logger.warning("Invalid source in payload")
+            self.logger.warning("Invalid source in payload", **log_context)
             return
-        dotbot = DotBotModel(
-            address=source,
-            application=payload.header.application,
-            last_seen=time.time(),
-        )
         notification_cmd = DotBotNotificationCommand.NONE
-        if source in self.dotbots:
-            dotbot.mode = self.dotbots[source].mode
-            dotbot.status = self.dotbots[source].status
-            dotbot.direction = self.dotbots[source].direction
-            dotbot.wind_angle = self.dotbots[source].wind_angle
-            dotbot.rudder_angle = self.dotbots[source].rudder_angle
-            dotbot.sail_angle = self.dotbots[source].sail_angle
-            dotbot.rgb_led = self.dotbots[source].rgb_led
-            dotbot.lh2_position = self.dotbots[source].lh2_position
-            dotbot.gps_position = self.dotbots[source].gps_position
-            dotbot.waypoints = self.dotbots[source].waypoints
-            dotbot.waypoints_threshold = self.dotbots[source].waypoints_threshold
-            dotbot.position_history = self.dotbots[source].position_history
+        dotbot = self.dotbots.get(source)
+        if dotbot is not None:
+            # Known dotbot, its model is updated in place
+            dotbot.application = payload.header.application
+            dotbot.last_seen = time.time()
         else:
+            dotbot = DotBotModel(
+                address=source,
+                application=payload.header.application,
+                last_seen=time.time(),
+            )
+            self.dotbots[source] = dotbot
             # reload if a new dotbot comes in
-            logger.info("New dotbot")
+            self.logger.info("New dotbot", **log_context)
             notification_cmd = DotBotNotificationCommand.RELOAD
 
+        previous_direction = dotbot.direction
         if (
             payload.payload_type in [PayloadType.DOTBOT_DATA, PayloadType.SAILBOT_DATA]
             and -500 <= payload.values.direction <= 500
         ):
             dotbot.direction = payload.values.direction
-            logger = logger.bind(direction=dotbot.direction)
-
-        if payload.payload_type in [PayloadType.SAILBOT_DATA]:
-            logger = logger.bind(
-                wind_angle=dotbot.wind_angle,
-                rudder_angle=dotbot.rudder_angle,
-                sail_angle=dotbot.sail_angle,
-            )
+            log_context["direction"] = dotbot.direction
 
         dotbot.lh2_position = self._compute_lh2_position(payload)
         if (
@@ -659,7 +720,12 @@ class Controller:
                 y=dotbot.lh2_position.y,
                 z=dotbot.lh2_position.z,
             )
-            logger.info("lh2-raw", x=dotbot.lh2_position.x, y=dotbot.lh2_position.y)
+            self.logger.info(
+                "lh2-raw",
+                **log_context,
+                x=dotbot.lh2_position.x,
+                y=dotbot.lh2_position.y,
+            )
             if (
                 not dotbot.position_history
                 or lh2_distance(dotbot.position_history[-1], new_position)
@@ -667,13 +733,11 @@ class Controller:
             ):
                 dotbot.position_history.append(new_position)
                 notification_cmd = DotBotNotificationCommand.UPDATE
-            if len(dotbot.position_history) > MAX_POSITION_HISTORY_SIZE:
-                dotbot.position_history.pop(0)
             # Send the computed position back to the dotbot
             header = ProtocolHeader(
-                destination=int(source, 16),
-                source=int(self.settings.gw_address, 16),
-                swarm_id=int(self.settings.swarm_id, 16),
+                destination=payload.header.source,
+                source=self.settings.gw_address_int,
+                swarm_id=self.settings.swarm_id_int,
                 application=dotbot.application,
                 version=PROTOCOL_VERSION,
             )
@@ -689,11 +753,12 @@ class Controller:
                 )
             )
         elif payload.payload_type == PayloadType.DOTBOT_DATA:
-            logger.warning("lh2: invalid position")
+            self.logger.warning("lh2: invalid position", **log_context)
 
         if payload.payload_type == PayloadType.LH2_PROCESSED_DATA:
-            logger.info(
+            self.logger.info(
                 "lh2-processed",
+                **log_context,
                 poly=payload.values.polynomial_index,
                 lfsr_index=payload.values.lfsr_index,
                 db_time=payload.values.timestamp_us,
@@ -715,13 +780,23 @@ class Controller:
                 latitude=float(payload.values.latitude) / 1e6,
                 longitude=float(payload.values.longitude) / 1e6,
             )
+            # Clients are only notified when something changed since the last
+            # payload, e.g. not when the sailbot is moored
+            changed = (
+                new_position != dotbot.gps_position
+                or dotbot.direction != previous_direction
+                or payload.values.wind_angle != dotbot.wind_angle
+                or payload.values.rudder_angle != dotbot.rudder_angle
+                or payload.values.sail_angle != dotbot.sail_angle
+            )
             dotbot.gps_position = new_position
             # Read wind sensor measurements
             dotbot.wind_angle = payload.values.wind_angle
             dotbot.rudder_angle = payload.values.rudder_angle
             dotbot.sail_angle = payload.values.sail_angle
-            logger.info(
+            self.logger.info(
                 "gps",
+                **log_context,
                 lat=new_position.latitude,
                 long=new_position.longitude,
                 wind_angle=dotbot.wind_angle,
@@ -734,87 +809,158 @@ class Controller:
                 >= GPS_POSITION_DISTANCE_THRESHOLD
             ):
                 dotbot.position_history.append(new_position)
-            if len(dotbot.position_history) > MAX_POSITION_HISTORY_SIZE:
-                dotbot.position_history.pop(0)
-            notification_cmd = DotBotNotificationCommand.UPDATE
+            if changed is True:
+                notification_cmd = DotBotNotificationCommand.UPDATE
+
+        if notification_cmd == DotBotNotificationCommand.NONE:
+            return
 
         if notification_cmd == DotBotNotificationCommand.UPDATE:
-            notification = DotBotNotificationModel(
-                cmd=notification_cmd.value,
-                data=DotBotNotificationUpdate(
-                    address=dotbot.address,
-                    direction=dotbot.direction,
-                    wind_angle=dotbot.wind_angle,
-                    rudder_angle=dotbot.rudder_angle,
-                    sail_angle=dotbot.sail_angle,
-                    lh2_position=dotbot.lh2_position,
-                    gps_position=dotbot.gps_position,
-                ),
+            # Updates received during the same loop iteration are coalesced,
+            # only the latest state of each dotbot is sent
+            if not self._updated_dotbots:
+                asyncio.get_running_loop().call_soon(self._flush_updates)
+            self._updated_dotbots.add(dotbot.address)
+            return
+        self._dispatch_notification(RELOAD_NOTIFICATION)
+
+    def _flush_updates(self):
+        """Sends an update notification for each dotbot updated since last flush."""
+        updated_dotbots, self._updated_dotbots = self._updated_dotbots, set()
+        for address in updated_dotbots:
+            dotbot = self.dotbots.get(address)
+            if dotbot is None:
+                continue
+            self._dispatch_notification(
+                DotBotNotificationModel(
+                    cmd=DotBotNotificationCommand.UPDATE.value,
+                    data=DotBotNotificationUpdate(
+                        address=dotbot.address,
+                        direction=dotbot.direction,
+                        wind_angle=dotbot.wind_angle,
+                        rudder_angle=dotbot.rudder_angle,
+                        sail_angle=dotbot.sail_angle,
+                        lh2_position=dotbot.lh2_position,
+                        gps_position=dotbot.gps_position,
+                    ),
+                )
             )
-        else:
-            notification = DotBotNotificationModel(cmd=notification_cmd.value)
 
-        if self.settings.verbose is True:
-            print(payload)
-        self.dotbots.update({dotbot.address: dotbot})
-        if notification_cmd != DotBotNotificationCommand.NONE:
+    def _dispatch_notification(self, notification: DotBotNotificationModel):
+        """Sends a notification from synchronous code."""
+        if self.websockets:
             asyncio.create_task(self.notify_clients(notification))
+        else:
+            # Only MQTT clients to notify, no need to schedule a task for that
+            self.qrkey.publish("/notify", notification.model_dump(exclude_none=True))
 
     async def _ws_send_safe(self, websocket: WebSocket, msg: str):
         """Safely send a message to a websocket client."""
         try:
             await websocket.send_text(msg)
         except websockets.exceptions.ConnectionClosedError:
-            await asyncio.sleep(0.1)
+            # Closed clients are forgotten instead of being retried forever
+            if websocket in self.websockets:
+                self.websockets.remove(websocket)
 
     async def notify_clients(self, notification):
         """Send a message to all clients connected."""
         self.logger.debug("notify", cmd=notification.cmd.name)
-        await asyncio.gather(
-            *[
-                self._ws_send_safe(
-                    websocket, json.dumps(notification.model_dump(exclude_none=True))
-                )
-                for websocket in self.websockets
-            ]
-        )
-        self.qrkey.publish("/notify", notification.model_dump(exclude_none=True))
+        message = notification.model_dump(exclude_none=True)
+        if self.websockets:
+            # Serialize once and iterate over a snapshot of the connected clients
+            text = json.dumps(message)
+            await asyncio.gather(
+                *[
+                    self._ws_send_safe(websocket, text)
+                    for websocket in tuple(self.websockets)
+                ]
+            )
+        self.qrkey.publish("/notify", message)
 
     def send_payload(self, payload: ProtocolPayload):
         """Sends a command in an HDLC frame over serial."""
-        destination = hexlify(
-            int(payload.header.destination).to_bytes(8, "big")
-        ).decode()
-        if destination not in self.dotbots:
+        destination = f"{payload.header.destination:016x}"
+        dotbot = self.dotbots.get(destination)
+        if dotbot is None:
             return
         # make sure the application in the payload matches the bot application
-        payload.header.application = self.dotbots[destination].application
+        payload.header.application = dotbot.application
         if self.serial is not None:
-            self.serial.write(hdlc_encode(payload.to_bytes()))
-            self.logger.debug(
-                "Payload sent",
-                application=payload.header.application.name,
-                destination=destination,
-                payload_type=payload.payload_type.name,
-            )
+            self._tx_queue.append(hdlc_encode(payload.to_bytes()))
+            self._tx_event.set()
+            if self._debug_enabled is False or self.settings.log_sample_every < 1:
+                return
+            self._log_counter += 1
+            if self._log_counter % self.settings.log_sample_every == 0:
+                self.logger.debug(
+                    "Payload sent",
+                    application=payload.header.application.name,
+                    destination=destination,
+                    payload_type=payload.payload_type.name,
+                )
 
-    def get_dotbots(self, query: DotBotQueryModel) -> List[DotBotModel]:
-        """Returns the list of dotbots matching the query."""
-        dotbots: List[DotBotModel] = []
-        for dotbot in self.dotbots.values():
-            if (
-                query.application is not None
-                and dotbot.application != query.application
+    def _flush_tx_queue(self):
+        """Writes the pending HDLC frames over serial, a batch at a time."""
+        while self._tx_queue:
+            batch = bytearray(self._tx_queue.popleft())
+            while (
+                self._tx_queue
+                and len(batch) + len(self._tx_queue[0]) <= SERIAL_TX_BATCH_MAX_SIZE
             ):
+                batch += self._tx_queue.popleft()
+            self.serial.write(batch)
+
+    async def _serial_writer(self):
+        """Coroutine that writes queued HDLC frames over serial."""
+        while 1:
+            await self._tx_event.wait()
+            self._tx_event.clear()
+            self._flush_tx_queue()
+
+    def _sorted_dotbots(self) -> list[str]:
+        """Returns the addresses of the known dotbots, sorted."""
+        # dotbots can also be added, removed or replaced directly in the dict,
+        # so the cache is checked against the current addresses
+        if self._sorted_dotbots_keys != self.dotbots.keys():
+            self._sorted_dotbots_keys = frozenset(self.dotbots)
+            self._sorted_dotbots_cache = sorted(self._sorted_dotbots_keys)
+        return self._sorted_dotbots_cache
+
+    def get_dotbots(self, query: DotBotQueryModel) -> list[DotBotModel]:
+        """Returns the list of dotbots matching the query."""
+        dotbots: list[DotBotModel] = []
+        # Only keep the filters that are set in the query
+        filters = [
+            (attrgetter(field), value)
+            for field, value in (
+                ("application", query.application),
+                ("mode", query.mode),
+                ("status", query.status),
+            )
+            if value is not None
+        ]
+        # The position history is bounded, no need to copy it when it fits
+        truncate_history = query.max_positions < MAX_POSITION_HISTORY_SIZE
+        for address in self._sorted_dotbots():
+            dotbot = self.dotbots.get(address)
+            if dotbot is None:
                 continue
-            if query.mode is not None and dotbot.mode != query.mode:
+            if any(getter(dotbot) != value for getter, value in filters):
                 continue
-            if query.status is not None and dotbot.status != query.status:
+            if truncate_history is False:
+                dotbots.append(dotbot)
                 continue
-            _dotbot = DotBotModel(**dotbot.model_dump())
-            _dotbot.position_history = _dotbot.position_history[: query.max_positions]
+            # Shallow copy, only the position history is replaced
+            _dotbot = dotbot.model_copy(
+                update={
+                    "position_history": list(
+                        islice(dotbot.position_history, query.max_positions)
+                    )
+                }
+            )
             dotbots.append(_dotbot)
-        return sorted(dotbots, key=lambda dotbot: dotbot.address)
+        return dotbots
 
     async def web(self):
         """Starts the web server application."""
@@ -822,7 +968,7 @@ class Controller:
         config = uvicorn.Config(
             api, port=self.settings.controller_port, log_level="critical"
         )
-        server = uvicorn.Server(config)
+        server = WebServer(config, self._web_ready)
 
         try:
             logger.info("Starting web server")
@@ -835,23 +981,28 @@ class Controller:
 
     async def run(self):
         """Launch the controller."""
-        tasks = []
+        if hasattr(asyncio, "eager_task_factory"):  # Python >= 3.12
+            # Notification tasks often complete without suspending, run them
+            # eagerly instead of scheduling them on the next loop iteration
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
         try:
-            tasks = [
-                asyncio.create_task(self.qrkey.start(subscriptions=self.subscriptions)),
-                asyncio.create_task(self.web()),
-                asyncio.create_task(self._open_webbrowser()),
-                asyncio.create_task(self._start_serial()),
-                asyncio.create_task(self._dotbots_status_refresh()),
-            ]
-            await asyncio.gather(*tasks)
-        except (
+            async with asyncio.TaskGroup() as tasks:
+                tasks.create_task(
+                    self.qrkey.start(subscriptions=self.subscriptions),
+                    name="Qrkey controller",
+                )
+                tasks.create_task(self.web(), name="Web server")
+                tasks.create_task(self._open_webbrowser(), name="Web browser")
+                tasks.create_task(self._start_serial(), name="Serial listener")
+                tasks.create_task(self._serial_writer(), name="Serial writer")
+                tasks.create_task(
+                    self._dotbots_status_refresh(), name="Dotbots status refresh"
+                )
+        except* (
             SerialInterfaceException,
             serial.serialutil.SerialException,
-        ) as exc:
-            self.logger.error(f"Error: {exc}")
-        except SystemExit:
+        ) as exc_group:
+            for exc in exc_group.exceptions:
+                self.logger.error(f"Error: {exc}")
+        except* SystemExit:
             self.logger.info("Stopping controller")
-        finally:
-            for task in tasks:
-                task.cancel()
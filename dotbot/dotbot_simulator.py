@@ -8,13 +8,13 @@
 
 import threading
 import time
+from collections.abc import Callable
 from dataclasses import dataclass
 from enum import Enum
-from math import atan2, cos, pi, sin, sqrt
-from typing import Callable
+from math import atan2, cos, pi, sin
 
 from dotbot import GATEWAY_ADDRESS_DEFAULT, SWARM_ID_DEFAULT
-from dotbot.hdlc import hdlc_decode, hdlc_encode
+from dotbot.hdlc import hdlc_decode, hdlc_encode, hdlc_split
 from dotbot.logger import LOGGER
 from dotbot.protocol import (
     PROTOCOL_VERSION,
@@ -29,17 +29,22 @@ from dotbot.protocol import (
 R = 1
 L = 2
 SIMULATOR_STEP_DELTA_T = 0.005
+SIMULATOR_BYTE_DELAY = 0.005  # seconds
+HALF_R = R / 2
+R_OVER_L = R / L
+TWO_PI = 2 * pi
 
 
 def diff_drive_bot(x_pos_old, y_pos_old, theta_old, v_right, v_left):
     """Execute state space model of a rigid differential drive robot."""
-    x_dot = R / 2 * (v_right + v_left) * cos(theta_old - pi) * 50000
-    y_dot = R / 2 * (v_right + v_left) * sin(theta_old - pi) * 50000
-    theta_dot = R / L * (-v_right + v_left)
+    linear_speed = HALF_R * (v_right + v_left)
+    x_dot = linear_speed * cos(theta_old - pi) * 50000
+    y_dot = linear_speed * sin(theta_old - pi) * 50000
+    theta_dot = R_OVER_L * (-v_right + v_left)
 
     x_pos = x_pos_old + x_dot * SIMULATOR_STEP_DELTA_T
     y_pos = y_pos_old + y_dot * SIMULATOR_STEP_DELTA_T
-    theta = (theta_old + theta_dot * SIMULATOR_STEP_DELTA_T) % (2 * pi)
+    theta = (theta_old + theta_dot * SIMULATOR_STEP_DELTA_T) % TWO_PI
 
     return x_pos, y_pos, theta
 
@@ -64,6 +69,20 @@ class DotBotSimulator:
 
     def __init__(self, address):
         self.address = address
+        self._address_int = int(address, 16)
+        # The header and the advertisement only depend on the address
+        self._header = ProtocolHeader(
+            destination=int(GATEWAY_ADDRESS_DEFAULT, 16),
+            source=self._address_int,
+            swarm_id=int(SWARM_ID_DEFAULT, 16),
+            application=ApplicationType.DotBot,
+            version=PROTOCOL_VERSION,
+        )
+        self._advertisement = hdlc_encode(
+            ProtocolPayload(
+                self._header, PayloadType.ADVERTISEMENT, Advertisement()
+            ).to_bytes()
+        )
         self.pos_x = 0.5 * 1e6
         self.pos_y = 0.5 * 1e6
         self.theta = 0
@@ -80,13 +99,7 @@ class DotBotSimulator:
 
     @property
     def header(self):
-        return ProtocolHeader(
-            destination=int(GATEWAY_ADDRESS_DEFAULT, 16),
-            source=int(self.address, 16),
-            swarm_id=int(SWARM_ID_DEFAULT, 16),
-            application=ApplicationType.DotBot,
-            version=PROTOCOL_VERSION,
-        )
+        return self._header
 
     def update(self):
         """State space model update."""
@@ -101,10 +114,12 @@ class DotBotSimulator:
         elif self.controller_mode == DotBotSimulatorMode.AUTOMATIC:
             delta_x = self.pos_x - self.waypoints[self.waypoint_index][0]
             delta_y = self.pos_y - self.waypoints[self.waypoint_index][1]
-            distance_to_target = sqrt(delta_x**2 + delta_y**2)
-
-            # check if we are close enough to the "next" waypoint
-            if distance_to_target < self.waypoint_threshold:
+            # check if we are close enough to the "next" waypoint, distances
+            # are compared squared to avoid a square root per update
+            if (
+                delta_x * delta_x + delta_y * delta_y
+                < self.waypoint_threshold * self.waypoint_threshold
+            ):
                 self.logger.info("Waypoint reached", waypoint_index=self.waypoint_index)
                 self.waypoint_index += 1
                 # check if there are no more waypoints:
@@ -120,11 +135,11 @@ class DotBotSimulator:
                 robot_angle = self.theta
                 angle_to_target = atan2(delta_y, delta_x)
                 if robot_angle >= pi:
-                    robot_angle = robot_angle - 2 * pi
+                    robot_angle = robot_angle - TWO_PI
                 # if (angle_to_target < 0):
                 #    angle_to_target = 2*pi + angle_to_target
 
-                error_angle = ((angle_to_target - robot_angle + pi) % (2 * pi)) - pi
+                error_angle = ((angle_to_target - robot_angle + pi) % TWO_PI) - pi
                 self.logger.debug(
                     "Moving to waypoint",
                     robot_angle=robot_angle,
@@ -153,18 +168,11 @@ class DotBotSimulator:
 
     def advertise(self):
         """Send an adertisement message to the gateway."""
-        payload = ProtocolPayload(
-            self.header,
-            PayloadType.ADVERTISEMENT,
-            Advertisement(),
-        )
-        return hdlc_encode(payload.to_bytes())
+        return self._advertisement
 
-    def decode_serial_input(self, frame):
-        """Decode the serial input received from the gateway."""
-        payload = ProtocolPayload.from_bytes(hdlc_decode(frame))
-
-        if self.address == hex(payload.header.destination)[2:]:
+    def handle_payload(self, payload: ProtocolPayload):
+        """Handle a payload received from the gateway."""
+        if payload.header.destination == self._address_int:
             if payload.payload_type == PayloadType.CMD_MOVE_RAW:
                 self.controller_mode = DotBotSimulatorMode.MANUAL
                 self.v_left = payload.values.left_y
@@ -216,23 +224,29 @@ class DotBotSimulatorSerialInterface(threading.Thread):
         advertising_intervals = [0] * len(self.dotbots)
         for dotbot in self.dotbots:
             for byte in dotbot.advertise():
-                self.callback(byte.to_bytes(length=1, byteorder="little"))
+                self.callback(bytes((byte,)))
         time.sleep(0.5)
 
         while 1:
             for idx, dotbot in enumerate(self.dotbots):
-                for byte in dotbot.update():
-                    self.callback(byte.to_bytes(length=1, byteorder="little"))
-                    time.sleep(0.005)
+                frame = dotbot.update()
+                for byte in frame:
+                    self.callback(bytes((byte,)))
+                # Sleep once per frame, as long as the previous per byte delay
+                time.sleep(len(frame) * SIMULATOR_BYTE_DELAY)
                 advertising_intervals[idx] += 1
                 if advertising_intervals[idx] == 100:
-                    for byte in dotbot.advertise():
-                        self.callback(byte.to_bytes(length=1, byteorder="little"))
-                        time.sleep(0.005)
+                    frame = dotbot.advertise()
+                    for byte in frame:
+                        self.callback(bytes((byte,)))
+                    time.sleep(len(frame) * SIMULATOR_BYTE_DELAY)
                     advertising_intervals[idx] = 0
             time.sleep(0.02)
 
     def write(self, bytes_):
         """Write bytes on the fake serial."""
-        for dotbot in self.dotbots:
-            dotbot.decode_serial_input(bytes_)
+        for frame in hdlc_split(bytes_):
+            # Decoded once, each simulated robot checks the destination
+            payload = ProtocolPayload.from_bytes(hdlc_decode(frame))
+            for dotbot in self.dotbots:
+                dotbot.handle_payload(payload)
@@ -70,6 +70,13 @@ const App = () => {
               }
               dotbotsTmp[idx].gps_position = newPosition;
             }
+            if (payload.data.rgb_led !== undefined && payload.data.rgb_led !== null) {
+              dotbotsTmp[idx].rgb_led = payload.data.rgb_led;
+            }
+            if (payload.data.waypoints !== undefined && payload.data.waypoints !== null) {
+              dotbotsTmp[idx].waypoints = payload.data.waypoints;
+              dotbotsTmp[idx].waypoints_threshold = payload.data.waypoints_threshold;
+            }
             setDotbots(dotbotsTmp);
           }
         }
@@ -123,6 +123,22 @@ def hdlc_encode(payload: bytes) -> bytes:
     return hdlc_frame
 
 
+def hdlc_split(data: bytes) -> list[bytes]:
+    """Splits contiguous HDLC frames into a list of frames.
+
+    >>> hdlc_split(b"~test\\x88\\x07~")
+    [b'~test\\x88\\x07~']
+    >>> hdlc_split(b"~test\\x88\\x07~~}^test}^\\x9d\\xa6~")
+    [b'~test\\x88\\x07~', b'~}^test}^\\x9d\\xa6~']
+    >>> hdlc_split(b"")
+    []
+    """
+    # Flags are always escaped within a frame so they can only be delimiters
+    return [
+        HDLC_FLAG + frame + HDLC_FLAG for frame in bytes(data).split(HDLC_FLAG) if frame
+    ]
+
+
 def hdlc_decode(frame: bytes) -> bytes:
     """Decodes an HDLC frame and return the payload it contains.
 
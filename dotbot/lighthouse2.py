@@ -16,7 +16,6 @@ from ctypes import CDLL
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import List, Optional
 
 import cv2
 import numpy as np
@@ -43,7 +42,7 @@ REFERENCE_POINTS_DEFAULT = [
 CALIBRATION_DIR = Path.home() / ".pydotbot"
 
 
-def _lh2_raw_data_to_counts(raw_data: Lh2RawData, func: callable) -> List[int]:
+def _lh2_raw_data_to_counts(raw_data: Lh2RawData, func: callable) -> list[int]:
     counts = [0] * 2
     pos_A = 0
     pos_B = 0
@@ -64,7 +63,7 @@ def _lh2_raw_data_to_counts(raw_data: Lh2RawData, func: callable) -> List[int]:
     return counts
 
 
-def lh2_raw_data_to_counts(raw_data: Lh2RawData) -> List[int]:
+def lh2_raw_data_to_counts(raw_data: Lh2RawData) -> list[int]:
     """Convert bits sequence to an array of counts."""
     return _lh2_raw_data_to_counts(raw_data, LH2_LIB.reverse_count_p)
 
@@ -140,11 +139,12 @@ class LighthouseManager:
             return DotBotCalibrationStateModel(state="done")
         return DotBotCalibrationStateModel(state="unknown")
 
-    def _load_calibration(self) -> Optional[CalibrationData]:
-        if not os.path.exists(self.calibration_output_path):
+    def _load_calibration(self) -> CalibrationData | None:
+        try:
+            with open(self.calibration_output_path, "rb") as calibration_file:
+                calibration = pickle.load(calibration_file)
+        except FileNotFoundError:
             return None
-        with open(self.calibration_output_path, "rb") as calibration_file:
-            calibration = pickle.load(calibration_file)
         self.state = LighthouseManagerState.Calibrated
         return calibration
 
@@ -256,7 +256,7 @@ class LighthouseManager:
         self.state = LighthouseManagerState.Calibrated
         self.logger.info("Calibration done", data=self.calibration_data)
 
-    def compute_position(self, raw_data: Lh2RawData) -> Optional[DotBotLH2Position]:
+    def compute_position(self, raw_data: Lh2RawData) -> DotBotLH2Position | None:
         """Compute the position coordinates from LH2 raw data and available calibration."""
         if self.state != LighthouseManagerState.Calibrated:
             return None
@@ -10,6 +10,7 @@ import logging.config
 
 import structlog
 
+LOGGER_NAME = "pydotbot"
 LOG_LEVEL_MAP = {
     "debug": logging.DEBUG,
     "info": logging.INFO,
@@ -34,6 +35,8 @@ SUPPORTED_HANDLERS_DEFAULT = {
 def setup_logging(filename, level, handlers):
     """Setup logging."""
     processors = [
+        # Drop filtered out events before running the other processors
+        structlog.stdlib.filter_by_level,
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
@@ -77,7 +80,7 @@ def setup_logging(filename, level, handlers):
         },
         "handlers": stdlib_handlers,
         "loggers": {
-            "pydotbot": {
+            LOGGER_NAME: {
                 "handlers": handlers,
                 "level": LOG_LEVEL_MAP[level],
                 "propagate": True,
@@ -87,4 +90,9 @@ def setup_logging(filename, level, handlers):
     logging.config.dictConfig(stdlib_config)
 
 
-LOGGER = structlog.get_logger("pydotbot")
+def is_debug_enabled() -> bool:
+    """Returns whether debug logs are emitted by the pydotbot logger."""
+    return logging.getLogger(LOGGER_NAME).isEnabledFor(logging.DEBUG)
+
+
+LOGGER = structlog.get_logger(LOGGER_NAME)
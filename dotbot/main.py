@@ -26,6 +26,11 @@ from dotbot import (
 from dotbot.controller import Controller, ControllerSettings
 from dotbot.logger import setup_logging
 
+try:
+    import uvloop
+except ImportError:  # pragma: nocover
+    uvloop = None
+
 
 @click.command()
 @click.option(
@@ -93,7 +98,8 @@ from dotbot.logger import setup_logging
 @click.option(
     "--log-output",
     type=click.Path(),
-    default=os.path.join(os.getcwd(), "pydotbot.log"),
+    # Resolved when the command runs, not when the module is imported
+    default=lambda: os.path.join(os.getcwd(), "pydotbot.log"),
     help="Filename where logs are redirected",
 )
 @click.option(
@@ -120,6 +126,8 @@ def main(
     print(f"Welcome to the DotBots controller (version: {pydotbot_version()}).")
 
     setup_logging(log_output, log_level, ["console", "file"])
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         controller = Controller(
             ControllerSettings(
@@ -9,10 +9,11 @@
 
 # pylint: disable=too-few-public-methods,no-name-in-module
 
+from collections import deque
 from enum import IntEnum
-from typing import Any, List, Optional, Union
+from typing import Any, Deque
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_serializer, field_validator
 
 from dotbot.protocol import ApplicationType, ControlModeType
 
@@ -91,7 +92,7 @@ class DotBotWaypoints(BaseModel):
     """Waypoints model."""
 
     threshold: int
-    waypoints: List[Union[DotBotLH2Position, DotBotGPSPosition]]
+    waypoints: list[DotBotLH2Position | DotBotGPSPosition]
 
 
 class DotBotStatus(IntEnum):
@@ -105,11 +106,11 @@ class DotBotStatus(IntEnum):
 class DotBotQueryModel(BaseModel):
     """Model class used to filter DotBots."""
 
-    max_positions: int = MAX_POSITION_HISTORY_SIZE
-    application: Optional[ApplicationType] = None
-    mode: Optional[ControlModeType] = None
-    status: Optional[DotBotStatus] = None
-    swarm: Optional[str] = None
+    max_positions: int = Field(default=MAX_POSITION_HISTORY_SIZE, ge=0)
+    application: ApplicationType | None = None
+    mode: ControlModeType | None = None
+    status: DotBotStatus | None = None
+    swarm: str | None = None
 
 
 class DotBotNotificationCommand(IntEnum):
@@ -125,20 +126,23 @@ class DotBotNotificationUpdate(BaseModel):
     """Update notification model."""
 
     address: str
-    direction: Optional[int]
-    wind_angle: Optional[int]
-    rudder_angle: Optional[int]
-    sail_angle: Optional[int]
-    lh2_position: Optional[DotBotLH2Position] = None
-    gps_position: Optional[DotBotGPSPosition] = None
+    direction: int | None = None
+    wind_angle: int | None = None
+    rudder_angle: int | None = None
+    sail_angle: int | None = None
+    lh2_position: DotBotLH2Position | None = None
+    gps_position: DotBotGPSPosition | None = None
+    rgb_led: DotBotRgbLedCommandModel | None = None
+    waypoints: list[DotBotLH2Position | DotBotGPSPosition] | None = None
+    waypoints_threshold: int | None = None
 
 
 class DotBotNotificationModel(BaseModel):
     """Model class used to send controller notifications."""
 
     cmd: DotBotNotificationCommand
-    data: Optional[DotBotNotificationUpdate] = None
-    pin_code: Optional[int] = None
+    data: DotBotNotificationUpdate | None = None
+    pin_code: int | None = None
 
 
 class DotBotRequestType(IntEnum):
@@ -171,14 +175,29 @@ class DotBotModel(BaseModel):
     status: DotBotStatus = DotBotStatus.ALIVE
     mode: ControlModeType = ControlModeType.MANUAL
     last_seen: float
-    direction: Optional[int] = None
-    wind_angle: Optional[int] = None
-    rudder_angle: Optional[int] = None
-    sail_angle: Optional[int] = None
-    move_raw: Optional[DotBotMoveRawCommandModel] = None
-    rgb_led: Optional[DotBotRgbLedCommandModel] = None
-    lh2_position: Optional[DotBotLH2Position] = None
-    gps_position: Optional[DotBotGPSPosition] = None
-    waypoints: List[Union[DotBotLH2Position, DotBotGPSPosition]] = []
+    direction: int | None = None
+    wind_angle: int | None = None
+    rudder_angle: int | None = None
+    sail_angle: int | None = None
+    move_raw: DotBotMoveRawCommandModel | None = None
+    rgb_led: DotBotRgbLedCommandModel | None = None
+    lh2_position: DotBotLH2Position | None = None
+    gps_position: DotBotGPSPosition | None = None
+    waypoints: list[DotBotLH2Position | DotBotGPSPosition] = []
     waypoints_threshold: int = 40
-    position_history: List[Union[DotBotLH2Position, DotBotGPSPosition]] = []
+    position_history: Deque[DotBotLH2Position | DotBotGPSPosition] = Field(
+        default_factory=lambda: deque(maxlen=MAX_POSITION_HISTORY_SIZE)
+    )
+
+    @field_validator("position_history")
+    @classmethod
+    def bound_position_history(cls, value):
+        """Make sure the position history never grows above its maximum size."""
+        if value.maxlen == MAX_POSITION_HISTORY_SIZE:
+            return value
+        return deque(value, maxlen=MAX_POSITION_HISTORY_SIZE)
+
+    @field_serializer("position_history")
+    def serialize_position_history(self, value):
+        """Dump the position history as a plain, JSON serializable, list."""
+        return list(value)
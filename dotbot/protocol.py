@@ -8,15 +8,21 @@
 """Module for the Dotbot protocol API."""
 
 import dataclasses
+import struct
 from abc import ABC, abstractmethod
 from binascii import hexlify
 from dataclasses import dataclass
 from enum import Enum, IntEnum
 from itertools import chain
-from typing import List
 
 PROTOCOL_VERSION = 9
 
+# Fixed layout of the header fields followed by the payload type
+HEADER_AND_TYPE_STRUCTS = {
+    "little": struct.Struct("<QQHBBIB"),
+    "big": struct.Struct(">QQHBBIB"),
+}
+
 
 class PayloadType(Enum):
     """Types of DotBot payload types."""
@@ -75,7 +81,7 @@ class ProtocolData(ABC):
 
     @property
     @abstractmethod
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         """Returns the list of fields in this data."""
 
     @staticmethod
@@ -96,7 +102,7 @@ class ProtocolHeader(ProtocolData):
     msg_id: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.destination, name="dst", length=8),
             ProtocolField(self.source, name="src", length=8),
@@ -128,7 +134,7 @@ class CommandMoveRaw(ProtocolData):
     right_y: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.left_x, name="lx", length=1, signed=True),
             ProtocolField(self.left_y, name="ly", length=1, signed=True),
@@ -150,7 +156,7 @@ class CommandRgbLed(ProtocolData):
     blue: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.red, name="red"),
             ProtocolField(self.green, name="green"),
@@ -169,7 +175,7 @@ class CommandXgoAction(ProtocolData):
     action: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.action, name="action"),
         ]
@@ -188,7 +194,7 @@ class Lh2RawLocation(ProtocolData):
     offset: int = 0x00
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.bits, name="bits", length=8),
             ProtocolField(self.polynomial_index, name="poly", length=1),
@@ -213,7 +219,7 @@ class Lh2ProcessedLocation(ProtocolData):
     timestamp_us: int = 0x00000000
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.polynomial_index, name="poly", length=1),
             ProtocolField(self.lfsr_index, name="lfsr_index", length=4),
@@ -233,10 +239,10 @@ class Lh2ProcessedLocation(ProtocolData):
 class Lh2RawData(ProtocolData):
     """Dataclass that holds LH2 raw data."""
 
-    locations: List[Lh2RawLocation] = dataclasses.field(default_factory=lambda: [])
+    locations: list[Lh2RawLocation] = dataclasses.field(default_factory=lambda: [])
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return list(chain(*[location.fields for location in self.locations]))
 
     @staticmethod
@@ -258,7 +264,7 @@ class LH2Location(ProtocolData):
     pos_z: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.pos_x, name="x", length=4),
             ProtocolField(self.pos_y, name="y", length=4),
@@ -279,10 +285,10 @@ class DotBotData(ProtocolData):
     """Dataclass that holds direction and LH2 raw data from DotBot application."""
 
     direction: int = 0xFFFF
-    locations: List[Lh2RawLocation] = dataclasses.field(default_factory=lambda: [])
+    locations: list[Lh2RawLocation] = dataclasses.field(default_factory=lambda: [])
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         _fields = [ProtocolField(self.direction, name="dir.", length=2, signed=True)]
         _fields += list(chain(*[location.fields for location in self.locations]))
         return _fields
@@ -306,7 +312,7 @@ class GPSPosition(ProtocolData):
     longitude: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.latitude, name="latitude", length=4, signed=True),
             ProtocolField(self.longitude, name="longitude", length=4, signed=True),
@@ -332,7 +338,7 @@ class SailBotData(ProtocolData):
     sail_angle: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.direction, name="dir.", length=2, signed=False),
             ProtocolField(self.latitude, name="latitude", length=4, signed=True),
@@ -363,7 +369,7 @@ class DotBotSimulatorData(ProtocolData):
     pos_y: int = 0
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.theta, name="theta", length=2),
             ProtocolField(self.pos_x, name="pos_x", length=4),
@@ -384,7 +390,7 @@ class Advertisement(ProtocolData):
     """Dataclass that holds an advertisement (emtpy)."""
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return []
 
     @staticmethod
@@ -399,7 +405,7 @@ class ControlMode(ProtocolData):
     mode: ControlModeType = ControlModeType.MANUAL
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         return [
             ProtocolField(self.mode, "mode"),
         ]
@@ -414,10 +420,10 @@ class LH2Waypoints(ProtocolData):
     """Dataclass that holds a list of LH2 waypoints."""
 
     threshold: int
-    waypoints: List[LH2Location] = dataclasses.field(default_factory=lambda: [])
+    waypoints: list[LH2Location] = dataclasses.field(default_factory=lambda: [])
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         _fields = [ProtocolField(len(self.waypoints), name="len.")]
         _fields += [ProtocolField(value=self.threshold, name="thr.")]
         _fields += list(chain(*[waypoint.fields for waypoint in self.waypoints]))
@@ -449,10 +455,10 @@ class GPSWaypoints(ProtocolData):
     """Dataclass that holds a list of GPS waypoints."""
 
     threshold: int
-    waypoints: List[GPSPosition] = dataclasses.field(default_factory=lambda: [])
+    waypoints: list[GPSPosition] = dataclasses.field(default_factory=lambda: [])
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         _fields = [ProtocolField(len(self.waypoints), name="len.")]
         _fields += [ProtocolField(value=self.threshold, name="thr.")]
         _fields += list(chain(*[waypoint.fields for waypoint in self.waypoints]))
@@ -489,12 +495,18 @@ class ProtocolPayload:
 
     def to_bytes(self, endian="little") -> bytes:
         """Converts a payload to a bytearray."""
-        buffer = bytearray()
-        for field in self.header.fields:
-            buffer += int(field.value).to_bytes(
-                length=field.length, byteorder=endian, signed=field.signed
+        header = self.header
+        buffer = bytearray(
+            HEADER_AND_TYPE_STRUCTS[endian].pack(
+                header.destination,
+                header.source,
+                header.swarm_id,
+                header.application,
+                header.version,
+                header.msg_id,
+                self.payload_type.value,
             )
-        buffer += int(self.payload_type.value).to_bytes(length=1, byteorder=endian)
+        )
         for field in self.values.fields:
             buffer += int(field.value).to_bytes(
                 length=field.length, byteorder=endian, signed=field.signed
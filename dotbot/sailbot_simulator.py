@@ -10,14 +10,14 @@
 import math
 import threading
 import time
+from collections.abc import Callable
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable
 
 from numpy import clip
 
 from dotbot import GATEWAY_ADDRESS_DEFAULT, SWARM_ID_DEFAULT
-from dotbot.hdlc import hdlc_decode, hdlc_encode
+from dotbot.hdlc import hdlc_decode, hdlc_encode, hdlc_split
 from dotbot.logger import LOGGER
 from dotbot.protocol import (
     PROTOCOL_VERSION,
@@ -103,6 +103,20 @@ class SailBotSimulator:
 
     def __init__(self, address):
         self.address = address
+        self._address_int = int(address, 16)
+        # The header and the advertisement only depend on the address
+        self._header = ProtocolHeader(
+            destination=int(GATEWAY_ADDRESS_DEFAULT, 16),
+            source=self._address_int,
+            swarm_id=int(SWARM_ID_DEFAULT, 16),
+            application=ApplicationType.SailBot,
+            version=PROTOCOL_VERSION,
+        )
+        self._advertisement = hdlc_encode(
+            ProtocolPayload(
+                self._header, PayloadType.ADVERTISEMENT, Advertisement()
+            ).to_bytes()
+        )
 
         self.true_wind_speed = 4  # [m/s]
         self.true_wind_angle = 0.34906  # [rad] (20 degrees)
@@ -134,13 +148,7 @@ class SailBotSimulator:
 
     @property
     def header(self):
-        return ProtocolHeader(
-            destination=int(GATEWAY_ADDRESS_DEFAULT, 16),
-            source=int(self.address, 16),
-            swarm_id=int(SWARM_ID_DEFAULT, 16),
-            application=ApplicationType.SailBot,
-            version=PROTOCOL_VERSION,
-        )
+        return self._header
 
     def _update_state_space_model(self, rudder_in_rad, sail_length_in_rad):
         # define model parameters
@@ -265,11 +273,10 @@ class SailBotSimulator:
         next_geo = self.waypoints[self.next_waypoint]
         next_x, next_y = geographical2cartesian(next_geo[0], next_geo[1])
 
-        # check if current position is within the threshold
-        distance2target = math.sqrt(
-            (next_x - current_x) ** 2 + (next_y - current_y) ** 2
-        )
-        if distance2target < self.waypoint_threshold:
+        # check if current position is within the threshold (squared distances)
+        delta_x = next_x - current_x
+        delta_y = next_y - current_y
+        if delta_x * delta_x + delta_y * delta_y < self.waypoint_threshold**2:
             self.next_waypoint += 1
             self.zigzag_flag = False
             return
@@ -346,12 +353,9 @@ class SailBotSimulator:
         )
         logger.debug("Loop end")
 
-    def decode_serial_input(self, frame):
-        """Decode the serial input received from the gateway."""
-
-        payload = ProtocolPayload.from_bytes(hdlc_decode(frame))
-
-        if self.address == hex(payload.header.destination)[2:]:
+    def handle_payload(self, payload: ProtocolPayload):
+        """Handle a payload received from the gateway."""
+        if payload.header.destination == self._address_int:
             if payload.payload_type == PayloadType.CMD_MOVE_RAW:
                 self.rudder_slider = (
                     payload.values.left_x - 256
@@ -402,12 +406,7 @@ class SailBotSimulator:
 
     def advertise(self):
         """Send an adertisement message to the gateway."""
-        payload = ProtocolPayload(
-            self.header,
-            PayloadType.ADVERTISEMENT,
-            Advertisement(),
-        )
-        return hdlc_encode(payload.to_bytes())
+        return self._advertisement
 
 
 class SailBotSimulatorSerialInterface(threading.Thread):
@@ -428,7 +427,7 @@ class SailBotSimulatorSerialInterface(threading.Thread):
         """Listen continuously at each byte received on the fake serial interface."""
         for sailbot in self.sailbots:
             for byte in sailbot.advertise():
-                self.callback(byte.to_bytes(length=1, byteorder="little"))
+                self.callback(bytes((byte,)))
 
         next_sim_time = time.time() + SIM_DELTA_T
         next_control_time = time.time() + CONTROL_DELTA_T
@@ -444,7 +443,7 @@ class SailBotSimulatorSerialInterface(threading.Thread):
             if updates_interval >= 10:
                 for update in updates:
                     for byte in update:
-                        self.callback(byte.to_bytes(length=1, byteorder="little"))
+                        self.callback(bytes((byte,)))
                         time.sleep(0.001)
                 updates_interval = 0
             updates_interval += 1
@@ -460,5 +459,8 @@ class SailBotSimulatorSerialInterface(threading.Thread):
 
     def write(self, bytes_):
         """Write bytes on the fake serial, similar to the real gateway."""
-        for sailbot in self.sailbots:
-            sailbot.decode_serial_input(bytes_)
+        for frame in hdlc_split(bytes_):
+            # Decoded once, each simulated robot checks the destination
+            payload = ProtocolPayload.from_bytes(hdlc_decode(frame))
+            for sailbot in self.sailbots:
+                sailbot.handle_payload(payload)
@@ -8,7 +8,7 @@
 import sys
 import threading
 import time
-from typing import Callable
+from collections.abc import Callable
 
 import serial
 from serial.tools import list_ports
@@ -40,9 +40,9 @@ class SerialInterface(threading.Thread):
     def __init__(self, port: str, baudrate: int, callback: Callable):
         self.callback = callback
         self.serial = serial.Serial(port, baudrate)
+        self._logger = LOGGER.bind(context=__name__)
         super().__init__(daemon=True)
         self.start()
-        self._logger = LOGGER.bind(context=__name__)
         self._logger.info("Serial port thread started")
 
     def run(self):
@@ -50,13 +50,16 @@ class SerialInterface(threading.Thread):
         try:
             while 1:
                 try:
-                    byte = self.serial.read(1)
-                except (TypeError, serial.serialutil.SerialException):
-                    byte = None
-                if byte is None:
+                    # Read everything already buffered in one call, blocks until
+                    # at least one byte is available
+                    data = self.serial.read(self.serial.in_waiting or 1)
+                except (TypeError, OSError, serial.serialutil.SerialException):
+                    data = None
+                if data is None:
                     self._logger.info("Serial port disconnected")
                     break
-                self.callback(byte)
+                for byte in data:
+                    self.callback(bytes((byte,)))
         except serial.serialutil.PortNotOpenError as exc:
             self._logger.error(f"{exc}")
             raise SerialInterfaceException(f"{exc}") from exc
@@ -6,7 +6,7 @@
 """Module for the web server application."""
 
 import os
-from typing import List
+from itertools import islice
 
 from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -19,6 +19,7 @@ from dotbot.models import (
     DotBotMoveRawCommandModel,
     DotBotNotificationCommand,
     DotBotNotificationModel,
+    DotBotNotificationUpdate,
     DotBotQueryModel,
     DotBotRgbLedCommandModel,
     DotBotWaypoints,
@@ -182,7 +183,14 @@ async def dotbots_waypoints(
     api.controller.dotbots[address].waypoints_threshold = waypoints.threshold
     api.controller.send_payload(payload)
     await api.controller.notify_clients(
-        DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD)
+        DotBotNotificationModel(
+            cmd=DotBotNotificationCommand.UPDATE,
+            data=DotBotNotificationUpdate(
+                address=address,
+                waypoints=waypoints_list,
+                waypoints_threshold=waypoints.threshold,
+            ),
+        )
     )
 
 
@@ -195,7 +203,7 @@ async def dotbot_positions_history_clear(address: str):
     """Clear the history of positions of a dotbot."""
     if address not in api.controller.dotbots:
         raise HTTPException(status_code=404, detail="No matching dotbot found")
-    api.controller.dotbots[address].position_history = []
+    api.controller.dotbots[address].position_history.clear()
 
 
 @api.get(
@@ -209,14 +217,19 @@ async def dotbot(address: str, query: DotBotQueryModel = Depends()):
     """Dotbot HTTP GET handler."""
     if address not in api.controller.dotbots:
         raise HTTPException(status_code=404, detail="No matching dotbot found")
-    _dotbot = DotBotModel(**api.controller.dotbots[address].model_dump())
-    _dotbot.position_history = _dotbot.position_history[: query.max_positions]
-    return _dotbot
+    _dotbot = api.controller.dotbots[address]
+    return _dotbot.model_copy(
+        update={
+            "position_history": list(
+                islice(_dotbot.position_history, query.max_positions)
+            )
+        }
+    )
 
 
 @api.get(
     path="/controller/dotbots",
-    response_model=List[DotBotModel],
+    response_model=list[DotBotModel],
     response_model_exclude_none=True,
     summary="Return the list of available dotbots",
     tags=["dotbots"],
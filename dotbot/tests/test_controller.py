@@ -1,23 +1,45 @@
 """Test module for controller base class."""
 
 import asyncio
+import json
 import time
 from dataclasses import dataclass
-from typing import List
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import serial
+import websockets
+from pydantic import ValidationError
 
-from dotbot.controller import Controller, ControllerSettings, gps_distance, lh2_distance
+from dotbot.controller import (
+    RELOAD_NOTIFICATION,
+    Controller,
+    ControllerSettings,
+    gps_distance,
+    lh2_distance,
+)
 from dotbot.hdlc import hdlc_encode
-from dotbot.models import DotBotGPSPosition, DotBotLH2Position, DotBotModel
+from dotbot.models import (
+    MAX_POSITION_HISTORY_SIZE,
+    DotBotGPSPosition,
+    DotBotLH2Position,
+    DotBotModel,
+    DotBotNotificationCommand,
+    DotBotNotificationModel,
+    DotBotQueryModel,
+    DotBotStatus,
+)
 from dotbot.protocol import (
+    PROTOCOL_VERSION,
+    Advertisement,
+    ApplicationType,
+    DotBotSimulatorData,
     PayloadType,
     ProtocolData,
     ProtocolField,
     ProtocolHeader,
     ProtocolPayload,
+    SailBotData,
 )
 
 
@@ -26,7 +48,7 @@ class ProtocolDataTest(ProtocolData):
     test: int = 0x1234
 
     @property
-    def fields(self) -> List[ProtocolField]:
+    def fields(self) -> list[ProtocolField]:
         """Returns the list of fields in this data."""
         return [
             ProtocolField(ProtocolDataTest.test, "test", 2),
@@ -62,6 +84,9 @@ async def test_controller(_, __, serial_write, capsys):
     # smoke test for the from_bytes static method of ProtocolDataTest
     assert len(ProtocolDataTest.from_bytes(bytearray([1, 2])).fields) == 1
     controller.send_payload(payload)
+    # payloads are queued and only written by the serial writer
+    assert serial_write.call_count == 0
+    controller._flush_tx_queue()
     assert serial_write.call_count == 1
     payload_expected = hdlc_encode(payload.to_bytes())
     assert serial_write.call_args_list[0].args[0] == payload_expected
@@ -85,6 +110,7 @@ async def test_controller_dont_send(_, __, serial_write):
     )
     # DotBot is not in the controller known dotbot, so the payload won't be sent
     controller.send_payload(payload)
+    controller._flush_tx_queue()
     assert serial_write.call_count == 0
 
 
@@ -98,7 +124,7 @@ def test_controller_saibot_simulator():
         controller = Controller(settings)
         try:
             await asyncio.wait_for(controller.run(), timeout=0.5)
-        except asyncio.TimeoutError:
+        except TimeoutError:
             pass
 
     loop = asyncio.get_event_loop()
@@ -116,13 +142,53 @@ def test_controller_dotbot_simulator(_):
         controller = Controller(settings)
         try:
             await asyncio.wait_for(controller.run(), timeout=0.5)
-        except asyncio.TimeoutError:
+        except TimeoutError:
             pass
 
     loop = asyncio.get_event_loop()
     loop.run_until_complete(start_simulator())
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("port", ["dotbot-simulator", "sailbot-simulator"])
+async def test_controller_simulator_handshake(port):
+    """Check the handshake option is ignored by the simulators."""
+    settings = ControllerSettings(port, "115200", "0", "456", "78", handshake=True)
+    controller = Controller(settings)
+    await controller._start_serial()
+    for _ in range(50):
+        if controller.dotbots:
+            break
+        await asyncio.sleep(0.02)
+    assert len(controller.dotbots) > 0
+
+
+@pytest.mark.asyncio
+@patch("dotbot.controller.SerialInterface")
+async def test_controller_serial_handshake(serial_interface):
+    """Check bytes received right after the handshake reply are decoded."""
+    advertisement = hdlc_encode(
+        ProtocolPayload(
+            ProtocolHeader(source=0x1), PayloadType.ADVERTISEMENT, Advertisement()
+        ).to_bytes()
+    )
+
+    def serial_write(_):
+        # The gateway replies and sends a frame straight after
+        callback = serial_interface.call_args.args[2]
+        for byte in bytes((PROTOCOL_VERSION,)) + advertisement:
+            callback(bytes((byte,)))
+
+    serial_interface.return_value.write.side_effect = serial_write
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", handshake=True
+    )
+    controller = Controller(settings)
+    await controller._start_serial()
+    await asyncio.sleep(0)
+    assert list(controller.dotbots) == ["0000000000000001"]
+
+
 @pytest.mark.parametrize(
     "last,new,result",
     [
@@ -152,3 +218,371 @@ def test_lh2_distance(last, new, result):
 )
 def test_gps_distance(last, new, result):
     assert gps_distance(last, new) == pytest.approx(result)
+
+
+def test_controller_get_dotbots_sorted():
+    """Check dotbots are returned sorted by address, including new ones."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    for address in ["0000000000000003", "0000000000000001"]:
+        controller.dotbots[address] = DotBotModel(
+            address=address, last_seen=time.time()
+        )
+    assert [
+        dotbot.address for dotbot in controller.get_dotbots(DotBotQueryModel())
+    ] == [
+        "0000000000000001",
+        "0000000000000003",
+    ]
+    controller.dotbots["0000000000000002"] = DotBotModel(
+        address="0000000000000002", last_seen=time.time()
+    )
+    assert [
+        dotbot.address for dotbot in controller.get_dotbots(DotBotQueryModel())
+    ] == [
+        "0000000000000001",
+        "0000000000000002",
+        "0000000000000003",
+    ]
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        (DotBotQueryModel(), ["0000000000000001", "0000000000000002"]),
+        (DotBotQueryModel(application=ApplicationType.SailBot), ["0000000000000002"]),
+        (DotBotQueryModel(status=DotBotStatus.LOST), ["0000000000000001"]),
+        (
+            DotBotQueryModel(
+                application=ApplicationType.SailBot, status=DotBotStatus.LOST
+            ),
+            [],
+        ),
+    ],
+)
+def test_controller_get_dotbots_filters(query, expected):
+    """Check dotbots are filtered using the query fields that are set."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.dotbots["0000000000000001"] = DotBotModel(
+        address="0000000000000001", last_seen=time.time(), status=DotBotStatus.LOST
+    )
+    controller.dotbots["0000000000000002"] = DotBotModel(
+        address="0000000000000002",
+        last_seen=time.time(),
+        application=ApplicationType.SailBot,
+    )
+    assert [dotbot.address for dotbot in controller.get_dotbots(query)] == expected
+
+
+def test_controller_get_dotbots_replaced():
+    """Check dotbots are listed after the dict is replaced by one of same size."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.dotbots = {
+        "0000000000000001": DotBotModel(
+            address="0000000000000001", last_seen=time.time()
+        ),
+    }
+    assert [
+        dotbot.address for dotbot in controller.get_dotbots(DotBotQueryModel())
+    ] == ["0000000000000001"]
+    controller.dotbots = {
+        "0000000000000002": DotBotModel(
+            address="0000000000000002", last_seen=time.time()
+        ),
+    }
+    assert [
+        dotbot.address for dotbot in controller.get_dotbots(DotBotQueryModel())
+    ] == ["0000000000000002"]
+
+
+def test_controller_get_dotbots_truncated_history():
+    """Check truncated histories are list copies of the stored deque."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    dotbot = DotBotModel(address="0000000000000001", last_seen=time.time())
+    for idx in range(5):
+        dotbot.position_history.append(DotBotLH2Position(x=idx, y=0, z=0))
+    controller.dotbots[dotbot.address] = dotbot
+    history = dotbot.position_history
+    result = controller.get_dotbots(DotBotQueryModel(max_positions=2))[0]
+    assert isinstance(result.position_history, list)
+    assert [position.x for position in result.position_history] == [0, 1]
+    assert dotbot.position_history is history
+    assert [position.x for position in history] == [0, 1, 2, 3, 4]
+    assert history.maxlen == MAX_POSITION_HISTORY_SIZE
+    assert (
+        controller.get_dotbots(DotBotQueryModel(max_positions=0))[0].position_history
+        == []
+    )
+    with pytest.raises(ValidationError):
+        DotBotQueryModel(max_positions=-1)
+
+
+def test_controller_get_dotbots_max_positions():
+    """Check the position history is only copied when it is truncated."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    dotbot = DotBotModel(address="0000000000000001", last_seen=time.time())
+    for idx in range(3):
+        dotbot.position_history.append(DotBotLH2Position(x=idx, y=0, z=0))
+    controller.dotbots[dotbot.address] = dotbot
+    assert controller.get_dotbots(DotBotQueryModel())[0] is dotbot
+    result = controller.get_dotbots(DotBotQueryModel(max_positions=2))[0]
+    assert result is not dotbot
+    assert [position.x for position in result.position_history] == [0, 1]
+    assert len(dotbot.position_history) == 3
+
+
+@pytest.mark.parametrize("log_sample_every,expected", [(0, 0), (1, 6), (3, 2)])
+def test_controller_send_payload_log_sampling(log_sample_every, expected):
+    """Check the sent payload debug logs are sampled."""
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", log_sample_every=log_sample_every
+    )
+    controller = Controller(settings)
+    controller.dotbots["0000000000000000"] = DotBotModel(
+        address="0000000000000000", last_seen=time.time()
+    )
+    controller.serial = MagicMock()
+    controller.logger = MagicMock()
+    controller._debug_enabled = True
+    payload = ProtocolPayload(
+        ProtocolHeader(0, 0, 0, 0, 0),
+        PayloadType.CMD_MOVE_RAW,
+        ProtocolDataTest(),
+    )
+    for _ in range(6):
+        controller.send_payload(payload)
+    assert controller.logger.debug.call_count == expected
+
+
+def test_controller_settings_status_refresh_interval():
+    """Check the status refresh interval cannot be set too low."""
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", status_refresh_interval=0.5
+    )
+    assert settings.status_refresh_interval == 0.5
+    with pytest.raises(ValueError):
+        ControllerSettings(
+            "/dev/null", "115200", "0", "456", "78", status_refresh_interval=0
+        )
+
+
+@pytest.mark.asyncio
+async def test_controller_position_history_bounded():
+    """Check the position history never grows above its maximum size."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    for idx in range(MAX_POSITION_HISTORY_SIZE + 10):
+        controller.handle_received_payload(
+            ProtocolPayload(
+                ProtocolHeader(source=0x1),
+                PayloadType.DOTBOT_SIMULATOR_DATA,
+                DotBotSimulatorData(theta=0, pos_x=idx, pos_y=0),
+            )
+        )
+    history = controller.dotbots["0000000000000001"].position_history
+    assert len(history) == MAX_POSITION_HISTORY_SIZE
+    assert history[0].x == 10 / 1e6
+    assert history[-1].x == (MAX_POSITION_HISTORY_SIZE + 9) / 1e6
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_controller_coalesce_updates():
+    """Check updates received in the same loop iteration are sent once."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    controller.dotbots["0000000000000001"] = DotBotModel(
+        address="0000000000000001", last_seen=time.time()
+    )
+    for idx in range(3):
+        controller.handle_received_payload(
+            ProtocolPayload(
+                ProtocolHeader(source=0x1),
+                PayloadType.DOTBOT_SIMULATOR_DATA,
+                DotBotSimulatorData(theta=0, pos_x=idx, pos_y=0),
+            )
+        )
+    controller.qrkey.publish.assert_not_called()
+    await asyncio.sleep(0)
+    controller.qrkey.publish.assert_called_once()
+    topic, message = controller.qrkey.publish.call_args.args
+    assert topic == "/notify"
+    assert message["cmd"] == DotBotNotificationCommand.UPDATE.value
+    assert message["data"]["lh2_position"]["x"] == 2 / 1e6
+
+
+@pytest.mark.asyncio
+async def test_controller_sailbot_data_unchanged():
+    """Check no update is sent when sailbot data did not change."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    controller.dotbots["0000000000000001"] = DotBotModel(
+        address="0000000000000001", last_seen=time.time()
+    )
+    payload = ProtocolPayload(
+        ProtocolHeader(source=0x1, application=ApplicationType.SailBot),
+        PayloadType.SAILBOT_DATA,
+        SailBotData(
+            direction=45,
+            latitude=48832313,
+            longitude=2412689,
+            wind_angle=90,
+            rudder_angle=10,
+            sail_angle=20,
+        ),
+    )
+    controller.handle_received_payload(payload)
+    await asyncio.sleep(0)
+    controller.qrkey.publish.assert_called_once()
+    controller.handle_received_payload(payload)
+    await asyncio.sleep(0)
+    controller.qrkey.publish.assert_called_once()
+    payload.values.wind_angle = 100
+    controller.handle_received_payload(payload)
+    await asyncio.sleep(0)
+    assert controller.qrkey.publish.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_controller_notify_clients():
+    """Check notifications are serialized once and sent to all clients."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    controller.websockets = [AsyncMock(), AsyncMock()]
+    notification = DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD)
+    await controller.notify_clients(notification)
+    expected = json.dumps(notification.model_dump(exclude_none=True))
+    for websocket in controller.websockets:
+        websocket.send_text.assert_awaited_once_with(expected)
+    controller.qrkey.publish.assert_called_once_with(
+        "/notify", notification.model_dump(exclude_none=True)
+    )
+
+
+@pytest.mark.asyncio
+async def test_controller_notify_clients_closed_websocket():
+    """Check closed websockets are removed from the connected clients."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    closed = AsyncMock()
+    closed.send_text.side_effect = websockets.exceptions.ConnectionClosedError(
+        None, None
+    )
+    connected = AsyncMock()
+    controller.websockets = [closed, connected]
+    await controller.notify_clients(RELOAD_NOTIFICATION)
+    assert controller.websockets == [connected]
+    connected.send_text.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_controller_dotbots_status_refresh():
+    """Check the status of dotbots is updated from their last seen time."""
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", status_refresh_interval=0.1
+    )
+    controller = Controller(settings)
+    controller.notify_clients = AsyncMock()
+    now = time.time()
+    for address, last_seen in [
+        ("0000000000000001", now),
+        ("0000000000000002", now - 10),
+        ("0000000000000003", now - 100),
+    ]:
+        controller.dotbots[address] = DotBotModel(address=address, last_seen=last_seen)
+    try:
+        await asyncio.wait_for(controller._dotbots_status_refresh(), timeout=0.15)
+    except TimeoutError:
+        pass
+    assert [dotbot.status for dotbot in controller.dotbots.values()] == [
+        DotBotStatus.ALIVE,
+        DotBotStatus.LOST,
+        DotBotStatus.DEAD,
+    ]
+    controller.notify_clients.assert_awaited_once_with(
+        DotBotNotificationModel(cmd=DotBotNotificationCommand.RELOAD)
+    )
+
+
+@pytest.mark.asyncio
+@patch("dotbot.controller.webbrowser.open")
+async def test_controller_open_webbrowser(webbrowser_open):
+    """Check the web browser is opened once the web server is started."""
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", 8002, webbrowser=True
+    )
+    controller = Controller(settings)
+    web = asyncio.create_task(controller.web())
+    await asyncio.wait_for(controller._open_webbrowser(), timeout=5)
+    web.cancel()
+    await web
+    webbrowser_open.assert_called_once()
+    assert webbrowser_open.call_args.args[0].startswith("http://localhost:8002/")
+
+
+@pytest.mark.parametrize("verbose", [False, True])
+def test_controller_decode_byte(verbose, capsys):
+    """Check payloads are decoded byte by byte and printed in verbose mode."""
+    settings = ControllerSettings(
+        "/dev/null", "115200", "0", "456", "78", verbose=verbose
+    )
+    controller = Controller(settings)
+    payload = ProtocolPayload(
+        ProtocolHeader(source=0x1),
+        PayloadType.DOTBOT_SIMULATOR_DATA,
+        DotBotSimulatorData(theta=0, pos_x=1000, pos_y=2000),
+    )
+    frame = hdlc_encode(payload.to_bytes())
+    capsys.readouterr()
+    decoded = [controller.decode_byte(bytes([byte])) for byte in frame]
+    assert decoded[:-1] == [None] * (len(frame) - 1)
+    assert decoded[-1].to_bytes() == payload.to_bytes()
+    assert (repr(payload) in capsys.readouterr().out) is verbose
+
+
+@pytest.mark.parametrize(
+    "topic,expected",
+    [
+        ("/command/0/0000000000000001/0/move_raw", ("0", "0000000000000001", "0")),
+        ("/command/0/0000000000000001/0/rgb_led", None),
+        ("/command/0/0000000000000001/move_raw", None),
+        ("/command/0/0000000000000001/0/move_raw/extra", None),
+    ],
+)
+def test_controller_parse_command_topic(topic, expected):
+    """Check command topics are split into swarm id, address and application."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    assert controller._parse_command_topic(topic, "move_raw") == expected
+
+
+def test_controller_on_command_rgb_led_notification():
+    """Check an rgb_led command notifies clients with an update."""
+    settings = ControllerSettings("/dev/null", "115200", "0", "456", "78")
+    controller = Controller(settings)
+    controller.qrkey = MagicMock()
+    controller.dotbots["0000000000000001"] = DotBotModel(
+        address="0000000000000001", last_seen=time.time()
+    )
+    controller.on_command_rgb_led(
+        "/command/0/0000000000000001/0/rgb_led", {"red": 1, "green": 2, "blue": 3}
+    )
+    controller.qrkey.publish.assert_called_once_with(
+        "/notify",
+        {
+            "cmd": DotBotNotificationCommand.UPDATE.value,
+            "data": {
+                "address": "0000000000000001",
+                "rgb_led": {"red": 1, "green": 2, "blue": 3},
+            },
+        },
+    )
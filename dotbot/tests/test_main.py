@@ -77,3 +77,17 @@ def test_main_interrupts(run, _, __):
     result = runner.invoke(main)
     assert result.exit_code != 0
     assert "Serial error: serial test error" in result.output
+
+
+@patch("dotbot.serial_interface.serial.Serial.open")
+@patch("dotbot.controller.QrkeyController")
+@patch("dotbot.controller.Controller.run")
+@patch("dotbot.main.setup_logging")
+def test_main_default_log_output(setup_logging, _, __, ___, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    result = runner.invoke(main)
+    assert result.exit_code == 0
+    setup_logging.assert_called_once_with(
+        str(tmp_path / "pydotbot.log"), "info", ["console", "file"]
+    )
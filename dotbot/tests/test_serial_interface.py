@@ -0,0 +1,22 @@
+"""Test module for the serial interface."""
+
+from unittest.mock import MagicMock, patch
+
+from dotbot.serial_interface import SerialInterface
+
+
+@patch("dotbot.serial_interface.serial.Serial")
+def test_serial_interface_read(serial_mock):
+    serial_mock.return_value.in_waiting = 3
+    serial_mock.return_value.read.side_effect = [b"abc", b"d", TypeError]
+    callback = MagicMock()
+    interface = SerialInterface("/dev/null", 115200, callback)
+    interface.join(timeout=1)
+    assert not interface.is_alive()
+    serial_mock.return_value.read.assert_called_with(3)
+    assert [call.args[0] for call in callback.call_args_list] == [
+        b"a",
+        b"b",
+        b"c",
+        b"d",
+    ]
@@ -461,6 +461,23 @@ async def test_get_dotbot(dotbots, address, code, found, result):
         assert response.json() == result
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/controller/dotbots?max_positions=-1",
+        "/controller/dotbots/12345?max_positions=-1",
+    ],
+)
+async def test_get_dotbots_negative_max_positions(url):
+    api.controller.dotbots = {
+        "12345": DotBotModel(address="12345", last_seen=123.4),
+    }
+    response = await client.get(url)
+    assert response.status_code == 422
+    api.controller.get_dotbots.assert_not_called()
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "dotbots,address,code,found",
@@ -568,7 +585,7 @@ async def test_clear_dotbot_position_history(dotbots, address, code, found):
     response = await client.delete(f"/controller/dotbots/{address}/positions")
     assert response.status_code == code
     if found is True:
-        assert api.controller.dotbots[address].position_history == []
+        assert len(api.controller.dotbots[address].position_history) == 0
 
 
 @pytest.mark.asyncio